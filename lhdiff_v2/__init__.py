@@ -7,9 +7,11 @@ It uses a combination of SimHash (Context) and Levenshtein Distance (Content)
 to accurately map lines between two versions of a file.
 
 Modules:
+    - dataset: Test-case discovery for the batch scripts.
     - engine: Core matching logic (Two-Pass Algorithm).
     - input_controller: Handles various input formats (Files, XML, Combined).
     - models: Data structures (LineNode).
     - optimizer: Genetic Algorithm for weight tuning.
+    - truth: Ground truth parsing (XML/JSON).
     - utils: Similarity calculations (SimHash, Levenshtein).
 """
@@ -7,17 +7,19 @@ It orchestrates the input parsing, engine initialization, optional calibration,
 and execution of the diff algorithm.
 
 Usage:
-    python -m lhdiff_v2.main <source_a> [source_b] [--calibrate]
+    python -m lhdiff_v2.main <source_a> [source_b] [--calibrate] [--format {text,json}]
 """
 import argparse
+import contextlib
+import json
 import sys
 import os
-import xml.etree.ElementTree as ET
 from .input_controller import InputController
 from .engine import LHEngine
 from .optimizer import GeneticOptimizer
 from .visualizer import HTMLVisualizer
 from .bug_classifier import BugClassifier
+from .truth import parse_truth_xml
 
 # Default Configuration
 DEFAULT_CONFIG = {
@@ -27,38 +29,11 @@ DEFAULT_CONFIG = {
     "PASS2_THRESHOLD": 0.50
 }
 
-def parse_truth_xml(xml_path):
-    """
-    Parses the XML Ground Truth if available.
-
-    Args:
-        xml_path (str): Path to the XML file containing ground truth.
-
-    Returns:
-        dict: A mapping of {old_line_num: new_line_num}.
-    """
-    truth_mapping = {}
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        version = root.find(".//VERSION[@NUMBER='2']")
-        if version is None: version = root.find(".//VERSION")
-            
-        if version is not None:
-            for loc in version.findall("LOCATION"):
-                orig = loc.get("ORIG")
-                new = loc.get("NEW")
-                if orig and new and int(new) != -1:
-                    truth_mapping[int(orig)] = int(new)
-    except:
-        pass
-    return truth_mapping
-
-def main():
+def main(argv=None):
     """
     Main execution function.
     
-    1. Parses command line arguments.
+    1. Parses command line arguments (argv, defaulting to sys.argv[1:]).
     2. Reads and parses input files.
     3. Initializes the LHEngine.
     4. Optionally runs auto-calibration if ground truth is found.
@@ -69,7 +44,9 @@ def main():
     parser.add_argument("source_a", help="First file or single combined/xml file")
     parser.add_argument("source_b", nargs="?", help="Second file (optional)")
     parser.add_argument("--calibrate", action="store_true", help="Run auto-calibration if ground truth is available")
-    args = parser.parse_args()
+    parser.add_argument("--format", choices=("text", "json"), default="text",
+                        help="Mapping output format on stdout (default: text)")
+    args = parser.parse_args(argv)
 
     # 1. Parse Input
     controller = InputController()
@@ -112,19 +89,28 @@ def main():
     # 4. Run Diff
     mappings = engine.run(config)
     
-    # 5. Generate Visual Report
-    print("Generating HTML Report...", file=sys.stderr)
-    vis = HTMLVisualizer()
-    vis.generate(nodes_a, nodes_b, mappings, "lhdiff_report.html")
-    
-    # 6. Run Bonus Bug Classification
-    print("Analyzing for Bug Fixes...", file=sys.stderr)
-    classifier = BugClassifier()
-    classifier.analyze_mappings(nodes_a, nodes_b, mappings)
+    # With JSON output, stdout carries only the mappings; the reports'
+    # console messages go to stderr instead.
+    report_out = sys.stderr if args.format == "json" else sys.stdout
+    with contextlib.redirect_stdout(report_out):
+        # 5. Generate Visual Report
+        print("Generating HTML Report...", file=sys.stderr)
+        vis = HTMLVisualizer()
+        vis.generate(nodes_a, nodes_b, mappings, "lhdiff_report.html")
+        
+        # 6. Run Bonus Bug Classification
+        print("Analyzing for Bug Fixes...", file=sys.stderr)
+        classifier = BugClassifier()
+        classifier.analyze_mappings(nodes_a, nodes_b, mappings)
     
     # 7. Output Results
-    for old, new_list in mappings:
-        print(f"{old} -> {','.join(map(str, new_list))}")
+    if args.format == "json":
+        # [[old_line, [new_lines]], ...]; -1 marks deletions and additions
+        json.dump(mappings, sys.stdout)
+        sys.stdout.write("\n")
+    else:
+        sys.stdout.write("".join(f"{old} -> {','.join(map(str, new_list))}\n"
+                                 for old, new_list in mappings))
 
 if __name__ == "__main__":
     main()
@@ -24,6 +24,9 @@ class BugClassifier:
         (r'(>=|<=|<|>)', "Boundary Condition Change", "Medium"),
         (r'synchronized', "Concurrency/Thread Safety", "High")
     ]
+    # Compiled once when the class is defined
+    _COMPILED_PATTERNS = [(re.compile(pattern), label, severity)
+                          for pattern, label, severity in PATTERNS]
 
     def analyze_mappings(self, nodes_a, nodes_b, mappings):
         """
@@ -38,12 +41,18 @@ class BugClassifier:
         
         found_count = 0
         
+        # Line number -> node, so each mapping is resolved by lookup
+        nodes_a_by_line = {n.original_line_number: n for n in nodes_a}
+        nodes_b_by_line = {n.original_line_number: n for n in nodes_b}
+        
         for old_idx, new_indices in mappings:
             if not new_indices: continue
             
             # Retrieve node objects
-            node_a = next((n for n in nodes_a if n.original_line_number == old_idx), None)
-            target_nodes = [n for n in nodes_b if n.original_line_number in new_indices]
+            node_a = nodes_a_by_line.get(old_idx)
+            # In file order, as the new lines appear
+            target_nodes = [nodes_b_by_line[ln] for ln in sorted(set(new_indices))
+                            if ln in nodes_b_by_line]
             
             if not node_a or not target_nodes: continue
             
@@ -54,9 +63,9 @@ class BugClassifier:
             detected = []
 
             # 1. Regex Patterns
-            for pattern, label, severity in self.PATTERNS:
+            for pattern, label, severity in self._COMPILED_PATTERNS:
                 # If pattern exists in NEW but NOT in OLD
-                if re.search(pattern, new_text) and not re.search(pattern, old_text):
+                if pattern.search(new_text) and not pattern.search(old_text):
                     detected.append((label, severity))
 
             # 2. Type Changes (Heuristic)
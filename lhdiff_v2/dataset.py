@@ -0,0 +1,58 @@
+"""
+Dataset discovery helpers shared by the batch scripts (evaluate/optimize).
+"""
+import os
+from typing import Optional, Tuple
+
+def list_cases(data_dir: str) -> Tuple[str, ...]:
+    """
+    Returns the sorted names of the test case folders in data_dir.
+
+    Uses os.scandir so directory checks come from the scan itself rather than
+    a stat() per entry.
+
+    Args:
+        data_dir (str): Directory containing test cases.
+
+    Returns:
+        Tuple[str, ...]: Folder names in sorted order.
+    """
+    with os.scandir(data_dir) as entries:
+        return tuple(sorted(entry.name for entry in entries if entry.is_dir()))
+
+def find_case_files(folder_path: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """
+    Locates the files of one test case in a single directory scan.
+
+    Supports the original format (<name>_1.java, <name>_2.java, <name>.xml)
+    and the new format (old.*, new.*, ground_truth.json).
+
+    Args:
+        folder_path (str): Directory of the test case.
+
+    Returns:
+        Tuple: (old_file, new_file, xml_file, json_file) names, None when missing.
+    """
+    old_f = new_f = xml_f = json_f = None
+    old_alt = new_alt = None
+    
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            name = entry.name
+            
+            # Strategy 1: Original Format (_1.java, _2.java, .xml)
+            if old_f is None and "_1.java" in name: old_f = name
+            if new_f is None and "_2.java" in name: new_f = name
+            if xml_f is None and ".xml" in name: xml_f = name
+            
+            # Strategy 2: New Format (old.*, new.*, ground_truth.json)
+            # old.java / new.java take precedence over other extensions
+            if name.startswith("old.") and (old_alt is None or name == "old.java"): old_alt = name
+            if name.startswith("new.") and (new_alt is None or name == "new.java"): new_alt = name
+            if json_f is None and "ground_truth.json" in name: json_f = name
+    
+    if not (old_f and new_f):
+        old_f = old_alt or old_f
+        new_f = new_alt or new_f
+    
+    return old_f, new_f, xml_f, json_f
@@ -1,7 +1,14 @@
-import difflib
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from operator import itemgetter
 from typing import List, Tuple, Dict, Set
 from .models import LineNode
 from .utils import SimilarityCalculator
+try:
+    # C implementation of difflib's matcher (same algorithm, same blocks).
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:
+    from difflib import SequenceMatcher
 
 class LHEngine:
     """
@@ -11,19 +18,44 @@ class LHEngine:
     def __init__(self, nodes_a: List[LineNode], nodes_b: List[LineNode]):
         self.nodes_a = nodes_a
         self.nodes_b = nodes_b
-        self.matrix = []
+        self.context_matrix = []
+        self.content_matrix = []  # None until a cell is first needed
         self.anchors = set()
+        # Distinct-line ids (shared by both files) and exact content ratios
+        # per id pair, so repeated lines ("}", "return ;") are compared once.
+        self.line_ids_a = []
+        self.line_ids_b = []
+        self.num_line_ids = 0
+        self.pair_similarity = {}
+        # Character counts per line id, built on first use (see run())
+        self.char_counts = None
+        # Node fields as parallel lists (structure of arrays), extracted once
+        # per engine: run() indexes these directly instead of going through
+        # LineNode attributes, and optimizer sweeps call run() many times.
+        self.contents_a = [n.content for n in nodes_a]
+        self.contents_b = [n.content for n in nodes_b]
+        self.line_numbers_a = [n.original_line_number for n in nodes_a]
+        self.line_numbers_b = [n.original_line_number for n in nodes_b]
+        self.lengths_b = [len(c) for c in self.contents_b]
         
         # Only build matrix if both files have content
         if nodes_a and nodes_b:
             self._build_matrix()
 
     def _build_matrix(self):
-        """Pre-calculates similarity scores and identifies anchors."""
-        a_contents = [n.content for n in self.nodes_a]
-        b_contents = [n.content for n in self.nodes_b]
+        """Identifies anchors and pre-calculates context similarity scores."""
+        # Exact-match anchors. Each distinct line gets a small integer id, so
+        # SequenceMatcher hashes and compares ints instead of strings; the
+        # matching blocks are identical.
+        line_ids = {}
+        a_ids = [line_ids.setdefault(c, len(line_ids)) for c in self.contents_a]
+        b_ids = [line_ids.setdefault(c, len(line_ids)) for c in self.contents_b]
         
-        matcher = difflib.SequenceMatcher(None, a_contents, b_contents)
+        self.line_ids_a = a_ids
+        self.line_ids_b = b_ids
+        self.num_line_ids = len(line_ids)
+        
+        matcher = SequenceMatcher(None, a_ids, b_ids)
         for block in matcher.get_matching_blocks():
             for k in range(block.size):
                 self.anchors.add((block.a + k, block.b + k))
@@ -31,21 +63,51 @@ class LHEngine:
         anchor_rows = {i for i, j in self.anchors}
         anchor_cols = {j for i, j in self.anchors}
         
-        self.matrix = [[(0.0, 0.0) for _ in range(len(self.nodes_b))] 
-                       for _ in range(len(self.nodes_a))]
+        # Context similarity is cheap (popcount), so it is computed up front.
+        # Content similarity (Levenshtein) is filled in lazily by run(): most
+        # pairs can be ruled out from the line lengths alone.
+        # Anchored rows are never scored, so they all share one read-only
+        # placeholder row instead of each allocating their own.
+        num_new = len(self.nodes_b)
+        anchor_context_row = [0.0] * num_new
+        anchor_content_row = [None] * num_new
+        # Anchored columns are never candidates either, so their context
+        # cells are left at 0.0 rather than computed.
+        simhashes_b = [None if j in anchor_cols else n.simhash
+                       for j, n in enumerate(self.nodes_b)]
         
+        # Rows are read-only, so old lines with the same fingerprint (common
+        # in repetitive code) share one row of context scores.
+        rows_by_simhash = {}
+        self.context_matrix = []
         for i, node_a in enumerate(self.nodes_a):
-            if i in anchor_rows: continue
-            
-            for j, node_b in enumerate(self.nodes_b):
-                if j in anchor_cols: continue
-                
-                content_sim = SimilarityCalculator.levenshtein_similarity(
-                    node_a.content, node_b.content)
-                context_sim = SimilarityCalculator.get_hamming_similarity(
-                    node_a.simhash, node_b.simhash)
-                
-                self.matrix[i][j] = (content_sim, context_sim)
+            if i in anchor_rows:
+                self.context_matrix.append(anchor_context_row)
+                continue
+            row = rows_by_simhash.get(node_a.simhash)
+            if row is None:
+                # Whole row of context scores in one pass
+                row = SimilarityCalculator.get_hamming_similarities(node_a.simhash, simhashes_b)
+                rows_by_simhash[node_a.simhash] = row
+            self.context_matrix.append(row)
+        self.content_matrix = [
+            anchor_content_row if i in anchor_rows else [None] * num_new
+            for i in range(len(self.nodes_a))
+        ]
+
+    def _get_char_counts(self) -> List[Dict[str, int]]:
+        """
+        Character counts per distinct line id. Computed once per engine
+        rather than per run(), so optimizer sweeps reuse them.
+        """
+        if self.char_counts is None:
+            char_counts = [None] * self.num_line_ids
+            for ids, contents in ((self.line_ids_a, self.contents_a), (self.line_ids_b, self.contents_b)):
+                for line_id, content in zip(ids, contents):
+                    if char_counts[line_id] is None:
+                        char_counts[line_id] = dict(Counter(content))
+            self.char_counts = char_counts
+        return self.char_counts
 
     def run(self, config: Dict, include_unmapped: bool = True) -> List[Tuple[int, List[int]]]:
         """
@@ -62,8 +124,9 @@ class LHEngine:
             - Additions appear as (-1, [new_line])
         """
         results = []
-        used_old = set()
-        used_new = set()
+        # Dense per-line flags: O(1) indexed checks instead of set hashing
+        used_old = bytearray(len(self.nodes_a))
+        used_new = bytearray(len(self.nodes_b))
 
         # Handle edge case: Empty old file (all additions)
         if not self.nodes_a and self.nodes_b:
@@ -83,90 +146,196 @@ class LHEngine:
         if not self.nodes_a and not self.nodes_b:
             return results
 
+        num_old = len(self.nodes_a)
+        num_new = len(self.nodes_b)
+        contents_a = self.contents_a
+        contents_b = self.contents_b
+        line_numbers_a = self.line_numbers_a
+        line_numbers_b = self.line_numbers_b
+
         # --- STEP 1: ANCHORS ---
         for i, j in self.anchors:
-            results.append((
-                self.nodes_a[i].original_line_number, 
-                [self.nodes_b[j].original_line_number]
-            ))
-            used_old.add(i)
-            used_new.add(j)
+            results.append((line_numbers_a[i], [line_numbers_b[j]]))
+            used_old[i] = 1
+            used_new[j] = 1
 
         # --- STEP 2: TWO-PASS MATCHING ---
+        content_weight = config["CONTENT_WEIGHT"]
+        context_weight = config["CONTEXT_WEIGHT"]
+        max_score = (1.0 * content_weight) + (1.0 * context_weight)
+        lengths_b = self.lengths_b
+        # The shared-character bound below only pays off against the
+        # pure-Python Levenshtein; rapidfuzz filters faster on its own.
+        char_bound = not SimilarityCalculator.NATIVE_LEVENSHTEIN
+        char_counts = self._get_char_counts() if char_bound else None
+        pair_similarity = self.pair_similarity
+        line_ids_b = self.line_ids_b
+        # Unused new-line indices in ascending order, compacted after every
+        # accepted match so later rows only scan what is still available.
+        free_new = [j for j in range(num_new) if not used_new[j]]
+        
         def run_pass(threshold):
-            for i, node_a in enumerate(self.nodes_a):
-                if i in used_old: continue
+            nonlocal free_new
+            # The free columns ordered by line length, to cut out the range
+            # of lengths a row can possibly match (see below). Rebuilt once
+            # per pass; columns used up during the pass are filtered out of
+            # each window instead.
+            free_by_length = sorted(free_new, key=lengths_b.__getitem__)
+            free_lengths = [lengths_b[j] for j in free_by_length]
+            for i in [i for i in range(num_old) if not used_old[i]]:
+                # A merge earlier in this pass may have consumed this row
+                if used_old[i]: continue
+                if not free_new: break
+                
+                content_row = self.content_matrix[i]
+                context_row = self.context_matrix[i]
+                content_a = contents_a[i]
+                len_a = len(content_a)
+                chars_a = char_counts[self.line_ids_a[i]] if char_bound else None
+                pair_base = self.line_ids_a[i] * self.num_line_ids
                 
-                best_score = -1
+                # Only scores above the threshold can be accepted, so the
+                # search starts there (first column wins ties).
+                best_score = threshold
                 best_match_idx = -1
                 
-                for j, node_b in enumerate(self.nodes_b):
-                    if j in used_new: continue
+                # Even with a perfect context score a column needs a content
+                # similarity above `needed`, and content similarity is at most
+                # shorter/longer length: only lengths in
+                # [needed * len_a, len_a / needed] can match. Bisect that window out of
+                # the length-sorted columns (widened by one character so
+                # rounding never drops a candidate; the exact bound below
+                # still applies) and scan it in column order, so ties still
+                # go to the first column.
+                candidates = free_new
+                if content_weight > 0 and len_a:
+                    needed = (threshold - context_weight) / content_weight
+                    if needed > 0:
+                        lo = bisect_left(free_lengths, needed * len_a - 1)
+                        hi = bisect_right(free_lengths, len_a / needed + 1)
+                        if hi - lo < len(free_new):
+                            candidates = sorted([j for j in free_by_length[lo:hi] if not used_new[j]])
+                
+                for j in candidates:
+                    context_score = context_row[j] * context_weight
+                    content_sim = content_row[j]
+                    
+                    if content_sim is None:
+                        # Levenshtein distance >= length difference, which
+                        # bounds the similarity from above. Skip the DP when
+                        # even that bound cannot beat the current best.
+                        len_b = lengths_b[j]
+                        if len_a > len_b:
+                            longest = len_a
+                            shortest = len_b
+                        else:
+                            longest = len_b
+                            shortest = len_a
+                        if longest:
+                            # Same expression as the similarity itself
+                            # (1 - distance / longest) so rounding agrees.
+                            upper = 1.0 - ((longest - shortest) / longest)
+                            if (upper * content_weight) + context_score <= best_score:
+                                continue
+                        
+                        # Tighter bound: only characters the two lines have in
+                        # common (as multisets) can be left unedited.
+                        if char_bound and longest:
+                            chars_b = char_counts[line_ids_b[j]]
+                            shared = 0
+                            for ch, count in chars_a.items():
+                                other = chars_b.get(ch)
+                                if other:
+                                    shared += count if count < other else other
+                            if ((1.0 - ((longest - shared) / longest)) * content_weight) + context_score <= best_score:
+                                continue
+                        
+                        # The same pair of lines may already have been
+                        # compared at another position in the files.
+                        pair_key = pair_base + line_ids_b[j]
+                        content_sim = pair_similarity.get(pair_key)
+                        if content_sim is None:
+                            # Ask only for ratios that could still win; the
+                            # margin keeps borderline pairs exact (rapidfuzz
+                            # rounds its cutoff). A cut-off result is not an
+                            # exact ratio, so it is not cached.
+                            cutoff = (((best_score - context_score) / content_weight) - 1e-6
+                                      if content_weight > 0 else 0.0)
+                            content_sim = SimilarityCalculator.levenshtein_similarity(
+                                content_a, contents_b[j], cutoff)
+                            if content_sim < cutoff:
+                                continue
+                            pair_similarity[pair_key] = content_sim
+                        content_row[j] = content_sim
                     
-                    content_sim, context_sim = self.matrix[i][j]
-                    score = (content_sim * config["CONTENT_WEIGHT"]) + \
-                            (context_sim * config["CONTEXT_WEIGHT"])
+                    score = (content_sim * content_weight) + context_score
                     
                     if score > best_score:
                         best_score = score
                         best_match_idx = j
+                        # Perfect content and context: nothing later can
+                        # score higher, and ties go to the first column.
+                        if score >= max_score:
+                            break
 
-                if best_score > threshold:
+                if best_match_idx != -1:
                     # Check for SPLIT
                     is_split = False
-                    if best_match_idx + 1 < len(self.nodes_b):
+                    if best_match_idx + 1 < num_new:
                         next_idx = best_match_idx + 1
-                        if next_idx not in used_new:
-                            merged_content = (self.nodes_b[best_match_idx].content + 
-                                            " " + self.nodes_b[next_idx].content)
+                        if not used_new[next_idx]:
+                            merged_content = (contents_b[best_match_idx] + 
+                                            " " + contents_b[next_idx])
                             merged_sim = SimilarityCalculator.levenshtein_similarity(
-                                node_a.content, merged_content)
-                            single_sim = self.matrix[i][best_match_idx][0]
+                                content_a, merged_content)
+                            single_sim = content_row[best_match_idx]
                             
                             if merged_sim > single_sim:
                                 results.append((
-                                    node_a.original_line_number,
-                                    [self.nodes_b[best_match_idx].original_line_number,
-                                     self.nodes_b[next_idx].original_line_number]
+                                    line_numbers_a[i],
+                                    [line_numbers_b[best_match_idx],
+                                     line_numbers_b[next_idx]]
                                 ))
-                                used_new.add(best_match_idx)
-                                used_new.add(next_idx)
-                                used_old.add(i)
+                                used_new[best_match_idx] = 1
+                                used_new[next_idx] = 1
+                                used_old[i] = 1
                                 is_split = True
 
                     # Check for MERGE
                     is_merge = False
-                    if not is_split and i + 1 < len(self.nodes_a):
+                    if not is_split and i + 1 < num_old:
                         next_old_idx = i + 1
-                        if next_old_idx not in used_old:
-                            merged_content_old = (node_a.content + " " + 
-                                                self.nodes_a[next_old_idx].content)
+                        if not used_old[next_old_idx]:
+                            merged_content_old = (content_a + " " + 
+                                                contents_a[next_old_idx])
                             merged_sim = SimilarityCalculator.levenshtein_similarity(
                                 merged_content_old, 
-                                self.nodes_b[best_match_idx].content)
-                            single_sim = self.matrix[i][best_match_idx][0]
+                                contents_b[best_match_idx])
+                            single_sim = content_row[best_match_idx]
                             
                             if merged_sim > single_sim:
                                 results.append((
-                                    node_a.original_line_number,
-                                    [self.nodes_b[best_match_idx].original_line_number]
+                                    line_numbers_a[i],
+                                    [line_numbers_b[best_match_idx]]
                                 ))
                                 results.append((
-                                    self.nodes_a[next_old_idx].original_line_number,
-                                    [self.nodes_b[best_match_idx].original_line_number]
+                                    line_numbers_a[next_old_idx],
+                                    [line_numbers_b[best_match_idx]]
                                 ))
-                                used_new.add(best_match_idx)
-                                used_old.add(i)
-                                used_old.add(next_old_idx)
+                                used_new[best_match_idx] = 1
+                                used_old[i] = 1
+                                used_old[next_old_idx] = 1
                                 is_merge = True
                     
                     if not is_split and not is_merge:
                         results.append((
-                            node_a.original_line_number,
-                            [self.nodes_b[best_match_idx].original_line_number]
+                            line_numbers_a[i],
+                            [line_numbers_b[best_match_idx]]
                         ))
-                        used_new.add(best_match_idx)
-                        used_old.add(i)
+                        used_new[best_match_idx] = 1
+                        used_old[i] = 1
+                    
+                    free_new = [j for j in free_new if not used_new[j]]
 
         run_pass(config["PASS1_THRESHOLD"])
         run_pass(config["PASS2_THRESHOLD"])
@@ -174,14 +343,19 @@ class LHEngine:
         # --- STEP 3: TRACK UNMAPPED (Deletions and Additions) ---
         if include_unmapped:
             # Deletions: Old lines that never got matched
-            for i, node_a in enumerate(self.nodes_a):
-                if i not in used_old:
-                    results.append((node_a.original_line_number, [-1]))
-            
-            # Additions: New lines that never got matched
-            for j, node_b in enumerate(self.nodes_b):
-                if j not in used_new:
-                    results.append((-1, [node_b.original_line_number]))
+            for i in range(num_old):
+                if not used_old[i]:
+                    results.append((line_numbers_a[i], [-1]))
+
+        # Every entry so far has a distinct old line number, so a plain sort
+        # on it gives the final order without a per-element key function.
+        results.sort(key=itemgetter(0))
+
+        if include_unmapped:
+            # Additions: New lines that never got matched (listed last, in
+            # new-file order)
+            for j in range(num_new):
+                if not used_new[j]:
+                    results.append((-1, [line_numbers_b[j]]))
 
-        results.sort(key=lambda x: (x[0] == -1, x[0]))  # Deletions first, then by line number
         return results
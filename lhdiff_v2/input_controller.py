@@ -1,11 +1,20 @@
 import os
 import re
+import sys
 import xml.etree.ElementTree as ET
 from abc import ABC, abstractmethod
 from typing import List, Tuple
 from .models import LineNode
 from .utils import SimilarityCalculator
 
+# Any symbol that is neither a word character nor whitespace (padded with spaces)
+_SYMBOL_PATTERN = re.compile(r'([^\w\s])')
+# The same padding for ASCII lines as a str.translate table (a single C pass),
+# built from the pattern itself so both paths agree.
+_ASCII_SYMBOL_TABLE = str.maketrans({
+    c: f' {c} ' for c in map(chr, range(128)) if _SYMBOL_PATTERN.match(c)
+})
+
 class InputParser(ABC):
     """Abstract base class for input parsers."""
     
@@ -37,9 +46,14 @@ class InputParser(ABC):
         if '\0' in line:
             return ""
             
-        line = line.strip().lower()
-        line = re.sub(r'([^\w\s])', r' \1 ', line)
-        return " ".join(line.split())
+        line = line.lower()
+        if line.isascii():
+            line = line.translate(_ASCII_SYMBOL_TABLE)
+        else:
+            line = _SYMBOL_PATTERN.sub(r' \1 ', line)
+        # Interned so repeated lines ("}", "return ;", ...) share one object
+        # and the engine's line-id dict compares them by identity.
+        return sys.intern(" ".join(line.split()))
 
 class RawFileParser(InputParser):
     """Parses two separate raw text/code files."""
@@ -49,17 +63,21 @@ class RawFileParser(InputParser):
         return self._read_file(source_a), self._read_file(source_b)
 
     def _read_file(self, filepath: str) -> List[Tuple[int, str]]:
-        lines = []
+        preprocess = self.preprocess_line
         try:
+            # One read and decode for the whole file. Text mode has already
+            # translated newlines, so splitting on '\n' numbers lines exactly
+            # as iterating the file would (unlike splitlines(), which also
+            # breaks on form feeds and other separators).
             with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                for i, line in enumerate(f):
-                    processed = self.preprocess_line(line)
-                    if processed: # Skip empty/binary lines
-                        lines.append((i + 1, processed))
+                raw_lines = f.read().split('\n')
         except FileNotFoundError:
             print(f"Warning: File not found: {filepath}")
             return []
-        return lines
+        # Skip empty/binary lines
+        return [(i, processed)
+                for i, line in enumerate(raw_lines, 1)
+                if (processed := preprocess(line))]
 
 class CombinedFileParser(InputParser):
     """Parses a single file containing both versions separated by delimiters."""
@@ -171,20 +189,36 @@ class InputController:
 
     def _create_nodes(self, lines: List[Tuple[int, str]]) -> List[LineNode]:
         nodes = []
-        # Extract just content for context window calculation
-        content_only = [content for _, content in lines]
+        # Tokenize each line and compute its SimHash votes once; a context
+        # window's votes are then just the sum over the lines it covers.
+        tokens_per_line = [content.split() for _, content in lines]
+        votes_per_line = [SimilarityCalculator.get_simhash_votes(tokens) for tokens in tokens_per_line]
+        counts_per_line = [len(tokens) for tokens in tokens_per_line]
+        
+        # Running sums over the window [i - window_size, i + window_size]:
+        # each step adds the line entering on the right and drops the one
+        # leaving on the left.
+        window = self.window_size
+        window_votes = sum(votes_per_line[:window])
+        window_count = sum(counts_per_line[:window])
         
         for i, (line_num, content) in enumerate(lines):
+            entering = i + window
+            if entering < len(lines):
+                window_votes += votes_per_line[entering]
+                window_count += counts_per_line[entering]
+            leaving = i - window - 1
+            if leaving >= 0:
+                window_votes -= votes_per_line[leaving]
+                window_count -= counts_per_line[leaving]
+            
             # Context for SimHash
-            start = max(0, i - self.window_size)
-            end = min(len(lines), i + self.window_size + 1)
-            context_text = " ".join(content_only[start:end])
-            simhash = SimilarityCalculator.get_simhash(context_text)
+            simhash = SimilarityCalculator.simhash_from_votes(window_votes, window_count)
             
             nodes.append(LineNode(
                 original_line_number=line_num,
                 content=content,
-                tokens=content.split(),
+                tokens=tokens_per_line[i],
                 simhash=simhash
             ))
         return nodes
@@ -12,6 +12,10 @@ class LineNode:
         tokens (List[str]): Tokenized version of the content.
         simhash (int): The 64-bit SimHash fingerprint of the line context.
     """
+    # One node per source line: slots keep each node small and make field
+    # access a fixed-offset load instead of an instance-dict lookup.
+    __slots__ = ('original_line_number', 'content', 'tokens', 'simhash')
+
     original_line_number: int
     content: str
     tokens: List[str]
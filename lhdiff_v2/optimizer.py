@@ -1,5 +1,7 @@
 import random
 import statistics
+from concurrent.futures import ProcessPoolExecutor
+from operator import eq
 from typing import Dict, List, Tuple
 from .engine import LHEngine
 
@@ -14,27 +16,46 @@ DEFAULT_RANGES = {
     "PASS2_THRESHOLD": (0.3, 0.6)
 }
 
+# Optimizer handed to each worker process once, at startup
+_worker_optimizer = None
+
+def _init_worker(optimizer):
+    global _worker_optimizer
+    _worker_optimizer = optimizer
+
+def _evaluate_in_worker(config):
+    return _worker_optimizer._evaluate(config)
+
 class GeneticOptimizer:
     """
     Optimizes LHDiff weights using a genetic algorithm.
     Leverages the LHEngine's matrix cache for speed.
     """
     
-    def __init__(self, engine: LHEngine, truth_mapping: Dict[int, int]):
+    def __init__(self, engine: LHEngine, truth_mapping: Dict[int, int], workers: int = None):
         """
         Initializes the optimizer.
 
         Args:
             engine (LHEngine): The engine instance (with pre-calculated matrix).
             truth_mapping (Dict[int, int]): Ground truth mapping {old_line: new_line}.
+            workers (int, optional): Number of worker processes. Defaults to the CPU count.
         """
         self.engine = engine
         self.truth_mapping = truth_mapping
+        self.workers = workers
         self.ranges = DEFAULT_RANGES.copy()
+        # Configs are rounded, so narrowed ranges keep drawing the same ones;
+        # the engine is deterministic, so each is scored only once.
+        self._score_cache = {}
 
     def optimize(self) -> Dict:
         """
         Runs the optimization loop and returns the best config.
+
+        The samples of a generation are independent, so they are scored in
+        parallel worker processes; results are consumed in sampling order,
+        so the outcome does not depend on the number of workers.
         
         Returns:
             Dict: The best configuration found.
@@ -45,24 +66,32 @@ class GeneticOptimizer:
         # Initial random config to start
         best_overall_config = self._get_random_config(self.ranges)
 
-        for gen in range(NUM_GENERATIONS):
-            gen_results = []
-            
-            for _ in range(SAMPLES_PER_GEN):
-                config = self._get_random_config(self.ranges)
-                score = self._evaluate(config)
-                gen_results.append((score, config))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            for gen in range(NUM_GENERATIONS):
+                gen_results = []
                 
-                if score > best_overall_score:
-                    best_overall_score = score
-                    best_overall_config = config
-            
-            # Sort and narrow
-            gen_results.sort(key=lambda x: x[0], reverse=True)
-            survivors = [x[1] for x in gen_results[:TOP_K_SURVIVORS]]
-            
-            if gen < NUM_GENERATIONS - 1:
-                self.ranges = self._narrow_ranges(survivors, self.ranges)
+                configs = [self._get_random_config(self.ranges) for _ in range(SAMPLES_PER_GEN)]
+                keys = [tuple(sorted(config.items())) for config in configs]
+                new_configs = {key: config for key, config in zip(keys, configs)
+                               if key not in self._score_cache}
+                scores = executor.map(_evaluate_in_worker, new_configs.values())
+                self._score_cache.update(zip(new_configs.keys(), scores))
+                
+                for key, config in zip(keys, configs):
+                    score = self._score_cache[key]
+                    gen_results.append((score, config))
+                    
+                    if score > best_overall_score:
+                        best_overall_score = score
+                        best_overall_config = config
+                
+                # Sort and narrow
+                gen_results.sort(key=lambda x: x[0], reverse=True)
+                survivors = [x[1] for x in gen_results[:TOP_K_SURVIVORS]]
+                
+                if gen < NUM_GENERATIONS - 1:
+                    self.ranges = self._narrow_ranges(survivors, self.ranges)
                 
         return best_overall_config
 
@@ -77,11 +106,9 @@ class GeneticOptimizer:
         # Convert to dict for checking
         pred_dict = {m[0]: m[1][0] for m in mappings if m[1]}
         
-        correct = 0
-        
-        for t_old, t_new in self.truth_mapping.items():
-            if pred_dict.get(t_old) == t_new:
-                correct += 1
+        # Predicted target of every truth line, compared pairwise (all in C)
+        predicted = map(pred_dict.get, self.truth_mapping.keys())
+        correct = sum(map(eq, predicted, self.truth_mapping.values()))
                 
         return (correct / total) * 100.0
 
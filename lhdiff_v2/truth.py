@@ -0,0 +1,83 @@
+"""
+Ground truth parsing shared by the CLI and the batch scripts (evaluate/optimize).
+"""
+import sys
+import json
+from typing import Dict, Optional
+import xml.etree.ElementTree as ET
+try:
+    # libxml2-backed parser; the stdlib module exposes the same iterparse API.
+    from lxml import etree as XML_BACKEND
+except ImportError:
+    XML_BACKEND = ET
+
+def parse_truth_xml(xml_path: str, include_deleted: bool = False) -> Dict[int, int]:
+    """
+    Parses an XML Ground Truth file.
+
+    Streams LOCATION elements with iterparse in a single pass, clearing them
+    as they are consumed. VERSION 2 is used when present, otherwise the
+    first VERSION in the file; only its direct LOCATION children count.
+    A file that fails to parse yields no mapping at all.
+
+    Args:
+        xml_path (str): Path to the XML file containing ground truth.
+        include_deleted (bool): If True, keeps NEW=-1 entries (deleted lines).
+
+    Returns:
+        dict: A mapping of {old_line_num: new_line_num}.
+    """
+    versions = {}
+    first_version: Optional[dict] = None
+    # (depth, mapping) of each VERSION element currently open
+    open_versions = []
+    depth = 0
+    try:
+        for event, elem in XML_BACKEND.iterparse(xml_path, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                # VERSION elements below the root, as in root.find(".//VERSION")
+                if elem.tag == "VERSION" and depth > 1:
+                    current = {}
+                    versions.setdefault(elem.get("NUMBER"), current)
+                    if first_version is None:
+                        first_version = current
+                    open_versions.append((depth, current))
+                continue
+            if elem.tag == "LOCATION":
+                if open_versions and open_versions[-1][0] == depth - 1:
+                    orig = elem.get("ORIG")
+                    new = elem.get("NEW")
+                    if orig and new and (include_deleted or int(new) != -1):
+                        open_versions[-1][1][int(orig)] = int(new)
+                elem.clear()
+            elif elem.tag == "VERSION":
+                if open_versions and open_versions[-1][0] == depth:
+                    open_versions.pop()
+                elem.clear()
+            depth -= 1
+    except Exception as e:
+        print(f"Error parsing XML {xml_path}: {e}", file=sys.stderr)
+        return {}
+    truth_mapping = versions.get("2", first_version)
+    return truth_mapping or {}
+
+def parse_truth_json(json_path: str) -> Dict[int, int]:
+    """
+    Parses a JSON Ground Truth file ({"mappings": {"1": 1, ...}}).
+
+    Args:
+        json_path (str): Path to the JSON file containing ground truth.
+
+    Returns:
+        dict: A mapping of {old_line_num: new_line_num}.
+    """
+    truth_mapping = {}
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+            for old_line, new_line in data.get("mappings", {}).items():
+                truth_mapping[int(old_line)] = int(new_line)
+    except Exception as e:
+        print(f"Error parsing JSON {json_path}: {e}", file=sys.stderr)
+    return truth_mapping
@@ -1,11 +1,46 @@
 import hashlib
-import difflib
+from functools import lru_cache
+from typing import List, Optional
+
+try:
+    # Optional C++ backend (bit-parallel Levenshtein). Falls back to the
+    # pure-Python DP below when the package is not installed.
+    from rapidfuzz.distance import Levenshtein as _RapidLevenshtein
+except ImportError:
+    _RapidLevenshtein = None
+
+# A 1 in the lowest bit of each of the 64 packed 32-bit vote lanes.
+_LANE_ONES = int.from_bytes(b'\x01\x00\x00\x00' * 64, 'little')
+# Maps the top byte of a lane to '1' when its high bit is set, else '0'.
+_LANE_SIGN_TO_BIT = bytes(b'0'[0] if b < 0x80 else b'1'[0] for b in range(256))
+
+# Similarity for every possible Hamming distance between two 64-bit hashes.
+_HAMMING_SIMILARITY = [1.0 - (d / 64.0) for d in range(65)]
+
+@lru_cache(maxsize=65536)
+def _token_lanes(token: str) -> int:
+    """
+    Spreads a token's 64-bit hash into 64 packed 32-bit lanes (one per bit,
+    holding ord('0') or ord('1')), ready to be summed for SimHash voting.
+    Source code reuses a small vocabulary, so most tokens are cache hits and
+    never reach MD5.
+    """
+    # Create a stable hash for the token
+    # md5 gives 128 bits, we only need 64.
+    digest = hashlib.md5(token.encode('utf-8')).digest()
+    # unpack 8 bytes to int
+    token_hash = int.from_bytes(digest[:8], byteorder='big')
+    return int.from_bytes(format(token_hash, '064b').encode('utf-32-le'), 'little')
 
 class SimilarityCalculator:
     """
     Static utility class for calculating SimHash and Levenshtein distance.
     """
 
+    # True when levenshtein_similarity runs in rapidfuzz's C++ backend, which
+    # applies score_cutoff natively (callers can skip their own prefilters).
+    NATIVE_LEVENSHTEIN = _RapidLevenshtein is not None
+
     @staticmethod
     def get_simhash(text: str) -> int:
         """
@@ -15,25 +50,40 @@ class SimilarityCalculator:
         tokens = text.split()
         if not tokens: return 0
         
-        v = [0] * 64
+        return SimilarityCalculator.simhash_from_votes(
+            SimilarityCalculator.get_simhash_votes(tokens), len(tokens))
+
+    @staticmethod
+    def get_simhash_votes(tokens: List[str]) -> int:
+        """
+        Sums the packed bit votes of the given tokens (see _token_lanes).
+
+        Votes are additive, so the votes of a concatenation of token lists
+        are the sum of the votes of its parts.
+        """
+        # Bit voting: one big-int addition per token
+        votes = 0
         for token in tokens:
-            # Create a stable hash for the token
-            # optimization: use just first 16 chars of hex digest (64 bits)
-            # md5 gives 128 bits, we only need 64.
-            digest = hashlib.md5(token.encode('utf-8')).digest()
-            # unpack 8 bytes to int
-            token_hash = int.from_bytes(digest[:8], byteorder='big')
-            
-            for i in range(64):
-                if (token_hash >> i) & 1:
-                    v[i] += 1
-                else:
-                    v[i] -= 1
-                
-        fingerprint = 0
-        for i in range(64):
-            if v[i] > 0: fingerprint |= (1 << i)
-        return fingerprint
+            votes += _token_lanes(token)
+        return votes
+
+    @staticmethod
+    def simhash_from_votes(votes: int, token_count: int) -> int:
+        """
+        Turns summed token votes into a SimHash fingerprint.
+        get_simhash(text) == simhash_from_votes(get_simhash_votes(tokens), len(tokens)).
+        """
+        if not token_count: return 0
+        
+        # Lane p counts bit (63 - p); a bit is set when it won the majority
+        # vote, i.e. when its count exceeds base + token_count // 2. Adding
+        # (2**31 - 1 - that) to every lane at once lifts exactly the winning
+        # lanes to 2**31 or above (lanes never overflow into each other), so
+        # each lane's high bit is the fingerprint bit.
+        limit = ord('0') * token_count + token_count // 2
+        lifted = votes + ((1 << 31) - 1 - limit) * _LANE_ONES
+        top_bytes = lifted.to_bytes(256, 'little')[3::4]
+        return int(top_bytes.translate(_LANE_SIGN_TO_BIT), 2)
 
     @staticmethod
     def get_hamming_similarity(hash1: int, hash2: int) -> float:
@@ -42,29 +92,102 @@ class SimilarityCalculator:
         Returns 1.0 (Identical) to 0.0 (Different).
         """
         x = (hash1 ^ hash2) & ((1 << 64) - 1)
-        distance = bin(x).count('1')
-        return 1.0 - (distance / 64.0)
+        # Native popcount; no intermediate binary string
+        return _HAMMING_SIMILARITY[x.bit_count()]
 
     @staticmethod
-    def levenshtein_similarity(s1: str, s2: str) -> float:
+    def get_hamming_similarities(hash1: int, hashes: List[Optional[int]]) -> List[float]:
+        """
+        Hamming similarity of one SimHash against a whole list of SimHashes.
+        Equivalent to calling get_hamming_similarity per pair, but uses a
+        native popcount and a lookup table instead of a call per cell.
+        None entries are skipped and score 0.0.
+        """
+        table = _HAMMING_SIMILARITY
+        return [0.0 if h is None else table[(hash1 ^ h).bit_count()] for h in hashes]
+
+    @staticmethod
+    def levenshtein_similarity(s1: str, s2: str, score_cutoff: float = 0.0) -> float:
         """
         Standard Levenshtein Ratio (0.0 to 1.0)
+        Uses rapidfuzz when available, otherwise a pure-Python bit-parallel DP.
+
+        Like rapidfuzz, returns 0.0 when the ratio is below score_cutoff; the
+        comparison then stops as soon as the cutoff is out of reach.
         """
+        # No ratio exceeds 1.0; rapidfuzz also rejects cutoffs outside [0, 1]
+        if score_cutoff > 1.0:
+            return 0.0
+        if _RapidLevenshtein is not None:
+            return _RapidLevenshtein.normalized_similarity(
+                s1, s2, score_cutoff=score_cutoff if score_cutoff > 0.0 else 0.0)
+
         if not s1 and not s2: return 1.0
         if not s1 or not s2: return 0.0
         
-        if len(s1) < len(s2): 
-            return SimilarityCalculator.levenshtein_similarity(s2, s1)
+        if s1 == s2: return 1.0
+        
+        if len(s1) < len(s2):
+            s1, s2 = s2, s1
+        longest = len(s1)
+        
+        # Largest distance whose ratio still reaches the cutoff, found with
+        # the same expression as the result so rounding cannot disagree.
+        max_dist = int((1.0 - score_cutoff) * longest)
+        while max_dist < longest and 1.0 - ((max_dist + 1) / longest) >= score_cutoff:
+            max_dist += 1
+        while max_dist >= 0 and 1.0 - (max_dist / longest) < score_cutoff:
+            max_dist -= 1
+        # The distance is at least the length difference
+        if longest - len(s2) > max_dist:
+            return 0.0
+        
+        # A shared prefix/suffix never contributes to the edit distance, so
+        # only the differing middle needs to be compared.
+        start = 0
+        limit = len(s2)
+        while start < limit and s1[start] == s2[start]:
+            start += 1
+        end1, end2 = len(s1), len(s2)
+        while end2 > start and s1[end1 - 1] == s2[end2 - 1]:
+            end1 -= 1
+            end2 -= 1
+        s1 = s1[start:end1]
+        s2 = s2[start:end2]
+        if not s2:
+            return 1.0 - (len(s1) / longest)
         
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
+        # Bit-parallel edit distance (Myers/Hyyro): one big-int bit per
+        # character of the longer string, so each character of the shorter
+        # string advances a whole DP column in a handful of int operations.
+        # Python ints are unbounded, so no blocking into 64-bit words.
+        peq = {}
+        bit = 1
+        for c in s1:
+            peq[c] = peq.get(c, 0) | bit
+            bit <<= 1
+        full = bit - 1
+        last = bit >> 1
+        vp = full
+        vn = 0
+        dist = len(s1)
+        # The distance moves by at most one per remaining character, so once
+        # dist + processed exceeds this it can no longer end within max_dist.
+        give_up = max_dist + len(s2)
+        for processed, c in enumerate(s2, 1):
+            x = peq.get(c, 0)
+            d0 = (((x & vp) + vp) ^ vp) | x | vn
+            hp = vn | (full & ~(d0 | vp))
+            hn = d0 & vp
+            if hp & last:
+                dist += 1
+            elif hn & last:
+                dist -= 1
+            if dist + processed > give_up:
+                return 0.0
+            hp = ((hp << 1) | 1) & full
+            hn = (hn << 1) & full
+            vp = hn | (full & ~(d0 | hp))
+            vn = hp & d0
         
-        dist = previous_row[-1]
-        return 1.0 - (dist / max(len(s1), len(s2)))
+        return 1.0 - (dist / longest)
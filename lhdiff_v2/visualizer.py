@@ -1,5 +1,11 @@
 import html
 import os
+from functools import lru_cache
+from itertools import islice
+
+# Source files repeat many short lines ("}", "return ;", imports), so escaped
+# forms are cached rather than recomputed per row.
+_escape = lru_cache(maxsize=8192)(html.escape)
 
 class HTMLVisualizer:
     """
@@ -141,10 +147,12 @@ class HTMLVisualizer:
     def generate(self, nodes_a, nodes_b, mappings, output_path="lhdiff_report.html"):
         html_content = [self.HEAD_TEMPLATE]
         map_dict = {m[0]: m[1] for m in mappings}
+        # Line number -> new-file node, so each mapped line is resolved by lookup
+        nodes_b_by_line = {n.original_line_number: n for n in nodes_b}
         
         for node_a in nodes_a:
             idx_a = node_a.original_line_number
-            content_a = html.escape(node_a.content)
+            content_a = _escape(node_a.content)
             mapped_indices = map_dict.get(idx_a, [])
             
             row_class = ""
@@ -153,7 +161,7 @@ class HTMLVisualizer:
             elif len(mapped_indices) > 1:
                 row_class = "row-modified"
             elif len(mapped_indices) == 1:
-                target_node = next((n for n in nodes_b if n.original_line_number == mapped_indices[0]), None)
+                target_node = nodes_b_by_line.get(mapped_indices[0])
                 if target_node and target_node.content != node_a.content:
                     row_class = "row-modified"
                 else:
@@ -164,10 +172,10 @@ class HTMLVisualizer:
             if mapped_indices:
                 new_lines_html = []
                 for idx_b in mapped_indices:
-                    node_b = next((n for n in nodes_b if n.original_line_number == idx_b), None)
+                    node_b = nodes_b_by_line.get(idx_b)
                     if node_b:
                         # Highlight line number in Blue for the link
-                        new_lines_html.append(f"<span style='color:#388bfd; font-weight:bold'>[{idx_b}]</span> {html.escape(node_b.content)}")
+                        new_lines_html.append(f"<span style='color:#388bfd; font-weight:bold'>[{idx_b}]</span> {_escape(node_b.content)}")
                 right_col_code = "<br>".join(new_lines_html)
                 right_col_num = str(mapped_indices[0]) if len(mapped_indices) == 1 else "*"
             else:
@@ -184,6 +192,10 @@ class HTMLVisualizer:
             html_content.append(row_html)
 
         html_content.append(self.FOOT_TEMPLATE)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(html_content))
+        # Write the parts one by one, newline-separated
+        with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write(html_content[0])
+            for part in islice(html_content, 1, None):
+                f.write("\n")
+                f.write(part)
         print(f"[Visualizer] Report generated successfully at: {os.path.abspath(output_path)}")
\ No newline at end of file
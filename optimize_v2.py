@@ -6,17 +6,19 @@ This script runs a Genetic Algorithm to find the optimal weights and thresholds
 for LHDiff V2 across the entire dataset.
 
 Usage:
-    python optimize_v2.py [data_dir]
+    python optimize_v2.py [data_dir] [--jobs N]
 """
-import json
 import sys
 import os
 import random
 import argparse
-import xml.etree.ElementTree as ET
+from operator import eq
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
 from lhdiff_v2.input_controller import InputController
 from lhdiff_v2.engine import LHEngine
+from lhdiff_v2.dataset import find_case_files, list_cases
+from lhdiff_v2.truth import parse_truth_json, parse_truth_xml
 
 # Optimization Constants
 NUM_GENERATIONS = 5
@@ -29,50 +31,60 @@ DEFAULT_RANGES = {
     "PASS2_THRESHOLD": (0.3, 0.6)
 }
 
-def parse_truth_json(json_path):
-    """Parses the JSON Ground Truth."""
-    truth_mapping = {}
-    try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-            for old_line, new_line in data.get("mappings", {}).items():
-                truth_mapping[int(old_line)] = int(new_line)
-    except Exception as e:
-        print(f"Error parsing JSON {json_path}: {e}")
-    return truth_mapping
-
-def parse_truth_xml(xml_path):
-    """Parses the XML Ground Truth."""
-    truth_mapping = {}
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        version = root.find(".//VERSION[@NUMBER='2']")
-        if version is None: version = root.find(".//VERSION")
-        if version is not None:
-            for loc in version.findall("LOCATION"):
-                orig = loc.get("ORIG")
-                new = loc.get("NEW")
-                if orig and new and int(new) != -1:
-                    truth_mapping[int(orig)] = int(new)
-    except:
-        pass
-    return truth_mapping
+def score_config(engines, config):
+    """
+    Scores one configuration over a list of (engine, truth_mapping) pairs.
+
+    Returns:
+        float: Accuracy in percent across all truth lines.
+    """
+    total_correct = 0
+    total_lines = 0
+    
+    # Test cases with identical inputs share one engine (see _load_data),
+    # so each engine only runs once per config.
+    mappings_by_engine = {}
+    for engine, truth in engines:
+        mappings = mappings_by_engine.get(engine)
+        if mappings is None:
+            mappings = mappings_by_engine[engine] = engine.run(config)
+        pred_dict = {m[0]: m[1][0] for m in mappings if m[1]}
+        
+        # Correct predictions, counted as in GeneticOptimizer._evaluate
+        predicted = map(pred_dict.get, truth.keys())
+        total_correct += sum(map(eq, predicted, truth.values()))
+        total_lines += len(truth)
+            
+    return (total_correct / total_lines * 100) if total_lines else 0
+
+# Engines handed to each worker process once, at startup
+_worker_engines = []
+
+def _init_worker(engines):
+    global _worker_engines
+    _worker_engines = engines
+
+def _score_in_worker(config):
+    return score_config(_worker_engines, config)
 
 class BatchOptimizer:
     """
     Manages the optimization process across multiple test cases.
     """
-    def __init__(self, data_dir, use_full_dataset=False):
+    def __init__(self, data_dir, use_full_dataset=False, workers=None):
         """
         Args:
             data_dir (str): Directory containing test cases.
             use_full_dataset (bool): If True, disables sampling.
+            workers (int, optional): Number of worker processes. Defaults to the CPU count.
         """
         self.data_dir = data_dir
         self.use_full_dataset = use_full_dataset
+        self.workers = workers
         self.engines = [] # List of (engine, truth_mapping)
         self.ranges = DEFAULT_RANGES.copy()
+        # Score per distinct config, as in GeneticOptimizer (lhdiff_v2/optimizer.py)
+        self._score_cache = {}
         
         self._load_data()
 
@@ -80,10 +92,12 @@ class BatchOptimizer:
         """Loads all valid test cases and pre-builds their engines."""
         print("Loading data and building matrices...", file=sys.stderr)
         controller = InputController()
+        # Engines keyed by their parsed input, so duplicate test cases (same
+        # old/new lines) share one engine; each case still counts separately.
+        engines_by_input = {}
         
         # 1. Get all potential folders
-        all_folders = [f for f in sorted(os.listdir(self.data_dir)) 
-                       if os.path.isdir(os.path.join(self.data_dir, f))]
+        all_folders = list(list_cases(self.data_dir))
         
         # 2. STATISTICAL SAMPLING (Pruning the Dataset)
         # If we have too many files, just pick 10 random ones to be our "Sample Population"
@@ -99,25 +113,7 @@ class BatchOptimizer:
         for folder in selected_folders:
             folder_path = os.path.join(self.data_dir, folder)
             
-            files = os.listdir(folder_path)
-            
-            # Strategy 1: Original Format
-            old_f = next((f for f in files if "_1.java" in f), None)
-            new_f = next((f for f in files if "_2.java" in f), None)
-            xml_f = next((f for f in files if ".xml" in f), None)
-            
-            # Strategy 2: New Format
-            if not (old_f and new_f):
-                old_candidates = [f for f in files if f.startswith("old.") and f != "old.java"]
-                new_candidates = [f for f in files if f.startswith("new.") and f != "new.java"]
-                
-                if "old.java" in files: old_f = "old.java"
-                elif old_candidates: old_f = old_candidates[0]
-                
-                if "new.java" in files: new_f = "new.java"
-                elif new_candidates: new_f = new_candidates[0]
-            
-            json_f = next((f for f in files if "ground_truth.json" in f), None)
+            old_f, new_f, xml_f, json_f = find_case_files(folder_path)
             
             if not (old_f and new_f): continue
             if not (xml_f or json_f): continue
@@ -140,50 +136,84 @@ class BatchOptimizer:
                     truth = parse_truth_xml(os.path.join(folder_path, xml_f))
                     
                 if truth:
-                    engine = LHEngine(nodes_a, nodes_b)
+                    key = (tuple((n.original_line_number, n.content) for n in nodes_a),
+                           tuple((n.original_line_number, n.content) for n in nodes_b))
+                    engine = engines_by_input.get(key)
+                    if engine is None:
+                        engine = engines_by_input[key] = LHEngine(nodes_a, nodes_b)
                     self.engines.append((engine, truth))
             except Exception:
                 pass
         print(f"Loaded {len(self.engines)} test cases.", file=sys.stderr)
 
     def _is_file_too_large(self, filepath, limit=2000):
+        """
+        True if the file has more than limit + 1 lines (or cannot be read).
+
+        Counts line breaks in binary blocks instead of decoding every line;
+        '\n', '\r\n' and a lone '\r' each end a line, as in text mode.
+        """
+        max_breaks = limit + 2
+        breaks = 0
+        last = b''
         try:
-            with open(filepath, 'r') as f:
-                for i, _ in enumerate(f):
-                    if i > limit: return True
-            return False
-        except:
+            with open(filepath, 'rb') as f:
+                while block := f.read(1 << 16):
+                    breaks += block.count(b'\n') + block.count(b'\r') - block.count(b'\r\n')
+                    # A '\r\n' split across two blocks was counted twice
+                    if last == b'\r' and block[:1] == b'\n':
+                        breaks -= 1
+                    if breaks >= max_breaks:
+                        return True
+                    last = block[-1:]
+        except OSError:
             return True
+        # An unterminated last line still counts
+        if last and last not in b'\r\n':
+            breaks += 1
+        return breaks >= max_breaks
 
     def optimize(self):
         """
         Runs the genetic algorithm to find the best global configuration.
+
+        The samples of a generation are independent, so they are scored in
+        parallel worker processes (each holding its own copy of the engines);
+        results are consumed in sampling order, so the run is unchanged.
         """
         print(f"Starting Optimization ({NUM_GENERATIONS} gens, {SAMPLES_PER_GEN} samples/gen)...")
         best_overall_score = 0
         best_overall_config = {}
         
-        for gen in range(NUM_GENERATIONS):
-            print(f"\n--- GENERATION {gen + 1} ---")
-            gen_results = []
-            
-            for i in range(SAMPLES_PER_GEN):
-                config = self._get_random_config(self.ranges)
-                score = self._evaluate_batch(config)
-                gen_results.append((score, config))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.engines,)) as executor:
+            for gen in range(NUM_GENERATIONS):
+                print(f"\n--- GENERATION {gen + 1} ---")
+                gen_results = []
                 
-                if score > best_overall_score:
-                    best_overall_score = score
-                    best_overall_config = config
-                    print(f"  New Best: {score:.2f}% | {config}")
-            
-            # Sort and narrow
-            gen_results.sort(key=lambda x: x[0], reverse=True)
-            survivors = [x[1] for x in gen_results[:TOP_K_SURVIVORS]]
-            
-            if gen < NUM_GENERATIONS - 1:
-                self.ranges = self._narrow_ranges(survivors, self.ranges)
+                configs = [self._get_random_config(self.ranges) for _ in range(SAMPLES_PER_GEN)]
+                keys = [tuple(sorted(config.items())) for config in configs]
+                new_configs = {key: config for key, config in zip(keys, configs)
+                               if key not in self._score_cache}
+                scores = executor.map(_score_in_worker, new_configs.values())
+                self._score_cache.update(zip(new_configs.keys(), scores))
+                
+                for key, config in zip(keys, configs):
+                    score = self._score_cache[key]
+                    gen_results.append((score, config))
+                    
+                    if score > best_overall_score:
+                        best_overall_score = score
+                        best_overall_config = config
+                        print(f"  New Best: {score:.2f}% | {config}")
+                
+                # Sort and narrow
+                gen_results.sort(key=lambda x: x[0], reverse=True)
+                survivors = [x[1] for x in gen_results[:TOP_K_SURVIVORS]]
                 
+                if gen < NUM_GENERATIONS - 1:
+                    self.ranges = self._narrow_ranges(survivors, self.ranges)
+                    
         print("\n" + "=" * 50)
         print("OPTIMIZATION COMPLETE")
         print(f"Highest Accuracy: {best_overall_score:.2f}%")
@@ -191,21 +221,6 @@ class BatchOptimizer:
         print(best_overall_config)
         print("=" * 50)
 
-    def _evaluate_batch(self, config):
-        total_correct = 0
-        total_lines = 0
-        
-        for engine, truth in self.engines:
-            mappings = engine.run(config)
-            pred_dict = {m[0]: m[1][0] for m in mappings if m[1]}
-            
-            for t_old, t_new in truth.items():
-                if pred_dict.get(t_old) == t_new:
-                    total_correct += 1
-                total_lines += 1
-                
-        return (total_correct / total_lines * 100) if total_lines else 0
-
     def _get_random_config(self, ranges):
         cfg = {}
         cfg["CONTENT_WEIGHT"] = round(random.uniform(*ranges["CONTENT_WEIGHT"]), 2)
@@ -232,7 +247,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("data_dir", nargs="?", default="data")
     parser.add_argument("--full", action="store_true", help="Disable sampling and use invalid files check")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                       help="Number of worker processes (default: CPU count)")
     args = parser.parse_args()
     
-    optimizer = BatchOptimizer(args.data_dir, use_full_dataset=args.full)
+    optimizer = BatchOptimizer(args.data_dir, use_full_dataset=args.full, workers=args.jobs)
     optimizer.optimize()
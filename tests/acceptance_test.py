@@ -1,53 +1,58 @@
 import unittest
-import subprocess
+import io
+import json
 import os
-import sys
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from lhdiff_v2.__main__ import main
 
 class TestAcceptance(unittest.TestCase):
     """
     Acceptance Tests: Verify the application from the user's perspective (CLI).
+    The CLI entry point runs in-process, so no interpreter is started per test.
     """
-    
+
+    def run_cli(self, *argv):
+        """Runs the CLI with argv; returns (exit_code, stdout)."""
+        out = io.StringIO()
+        code = 0
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            try:
+                main(list(argv))
+            except SystemExit as e:
+                code = e.code
+        return code, out.getvalue()
+
     def test_cli_help(self):
         """Test that --help runs without error."""
-        result = subprocess.run(
-            [sys.executable, "-m", "lhdiff_v2", "--help"],
-            capture_output=True,
-            text=True
-        )
-        self.assertEqual(result.returncode, 0)
-        self.assertIn("LHDiff V2", result.stdout)
+        code, stdout = self.run_cli("--help")
+        self.assertEqual(code, 0)
+        self.assertIn("LHDiff V2", stdout)
 
     def test_cli_basic_flow(self):
         """Test running on a real file pair (if available)."""
-        # Use a small dummy file pair for speed
+        # Use a small dummy file pair for speed. Run from a temporary
+        # directory, so the inputs and the HTML report are removed afterwards.
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp.name)
         with open("acc_test_a.txt", "w") as f: f.write("line 1\nline 2")
         with open("acc_test_b.txt", "w") as f: f.write("line 1\nline 3")
-        
-        try:
-            result = subprocess.run(
-                [sys.executable, "-m", "lhdiff_v2", "acc_test_a.txt", "acc_test_b.txt"],
-                capture_output=True,
-                text=True
-            )
-            self.assertEqual(result.returncode, 0)
-            # Expect 1->1 match
-            self.assertIn("1 -> 1", result.stdout)
-        finally:
-            if os.path.exists("acc_test_a.txt"): os.remove("acc_test_a.txt")
-            if os.path.exists("acc_test_b.txt"): os.remove("acc_test_b.txt")
+
+        code, stdout = self.run_cli("acc_test_a.txt", "acc_test_b.txt", "--format", "json")
+        self.assertEqual(code, 0)
+        # Expect 1->1 match
+        mappings = {old: new for old, new in json.loads(stdout)}
+        self.assertEqual(mappings[1], [1])
+        self.assertTrue(os.path.exists("lhdiff_report.html"))
 
     def test_cli_missing_file(self):
         """Test error handling for missing files."""
-        result = subprocess.run(
-            [sys.executable, "-m", "lhdiff_v2", "non_existent_file.txt"],
-            capture_output=True,
-            text=True
-        )
-        # Should probably exit with 0 but print error, or exit 1. 
-        # Current implementation prints warning and returns empty list, so exit 0.
-        # But let's check stdout for warning.
-        self.assertIn("Warning: File not found", result.stdout)
+        code, stdout = self.run_cli("non_existent_file.txt")
+        # Nothing to diff: the parser warns, then the CLI exits with 1
+        self.assertIn("Warning: File not found", stdout)
+        self.assertEqual(code, 1)
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,12 +1,11 @@
 import unittest
 import os
 import csv
-import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from lhdiff_v2.input_controller import InputController
 from lhdiff_v2.engine import LHEngine
-
-# Add parent dir to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lhdiff_v2.dataset import find_case_files, list_cases
 
 DATA_DIR = "data"
 BASELINE_FILE = "output/predictions.csv"
@@ -19,6 +18,58 @@ CONFIG = {
     "PASS2_THRESHOLD": 0.56
 }
 
+# Below this many cases, starting worker processes costs more than it saves
+PARALLEL_MIN_CASES = 16
+
+@lru_cache(maxsize=None)
+def parse_corpus(data_dir):
+    """
+    Parses every test case folder in data_dir, once per test run.
+
+    Parsing is pure, so tests (and reruns within a session) that need the
+    same corpus share the parsed nodes and only repeat the engine work.
+
+    Returns:
+        Dict[str, Union[Tuple[List[LineNode], List[LineNode]], Exception]]:
+            folder -> (nodes_a, nodes_b), or the error raised while parsing.
+    """
+    controller = InputController()
+    corpus = {}
+    
+    # One os.scandir per directory (see lhdiff_v2.dataset)
+    for folder in list_cases(data_dir):
+        folder_path = os.path.join(data_dir, folder)
+        old_f, new_f, _, _ = find_case_files(folder_path)
+        
+        if not (old_f and new_f): continue
+        
+        try:
+            corpus[folder] = controller.parse(
+                os.path.join(folder_path, old_f),
+                os.path.join(folder_path, new_f)
+            )
+        except Exception as e:
+            corpus[folder] = e
+    return corpus
+
+def run_case(parsed):
+    """
+    Runs the engine on one parse_corpus entry. Module-level so that worker
+    processes can run it.
+
+    Returns:
+        The mappings, or the exception raised while parsing or running.
+    """
+    try:
+        if isinstance(parsed, Exception):
+            raise parsed
+        nodes_a, nodes_b = parsed
+        
+        engine = LHEngine(nodes_a, nodes_b)
+        return engine.run(CONFIG)
+    except Exception as e:
+        return e
+
 class TestRegression(unittest.TestCase):
     def test_regression(self):
         if not os.path.exists(BASELINE_FILE):
@@ -43,40 +94,30 @@ class TestRegression(unittest.TestCase):
         # Since parsing the big CSV might be complex without knowing exact format,
         # let's iterate through data/ folders and run lhdiff_v2, asserting we get results.
         
-        controller = InputController()
-        
-        total_files = 0
         success_files = 0
         
-        for folder in sorted(os.listdir(DATA_DIR)):
-            folder_path = os.path.join(DATA_DIR, folder)
-            if not os.path.isdir(folder_path): continue
-            
-            files = os.listdir(folder_path)
-            old_f = next((f for f in files if "_1.java" in f), None)
-            new_f = next((f for f in files if "_2.java" in f), None)
-            
-            if not (old_f and new_f): continue
-            
-            try:
-                nodes_a, nodes_b = controller.parse(
-                    os.path.join(folder_path, old_f),
-                    os.path.join(folder_path, new_f)
-                )
-                
-                engine = LHEngine(nodes_a, nodes_b)
-                mappings = engine.run(CONFIG)
-                
-                if mappings:
-                    success_files += 1
-                total_files += 1
-                
-            except Exception as e:
-                print(f"Failed on {folder}: {e}")
+        corpus = parse_corpus(DATA_DIR)
+        # Cases are independent and CPU-bound, so they are spread over worker
+        # processes once there are enough of them to pay for the pool.
+        # Results are consumed lazily: the first failure ends the test, and
+        # cases not yet started are cancelled.
+        workers = os.cpu_count() or 1
+        if workers > 1 and len(corpus) >= PARALLEL_MIN_CASES:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            self.addCleanup(executor.shutdown, cancel_futures=True)
+            results = executor.map(run_case, corpus.values(), chunksize=4)
+        else:
+            results = map(run_case, corpus.values())
+        
+        for folder, result in zip(corpus, results):
+            if isinstance(result, Exception):
+                self.fail(f"Failed on {folder}: {result}")
+            if not result:
+                self.fail(f"No mappings for {folder}")
+            success_files += 1
 
-        print(f"Regression: Successfully ran on {success_files}/{total_files} files.")
+        print(f"Regression: Successfully ran on {success_files}/{len(corpus)} files.")
         self.assertGreater(success_files, 0)
-        self.assertEqual(success_files, total_files)
 
 if __name__ == '__main__':
     unittest.main()
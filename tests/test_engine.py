@@ -9,6 +9,13 @@ class TestUtils(unittest.TestCase):
         self.assertAlmostEqual(SimilarityCalculator.levenshtein_similarity("abc", "def"), 0.0)
         self.assertAlmostEqual(SimilarityCalculator.levenshtein_similarity("kitten", "sitting"), 0.57, places=2)
 
+    def test_levenshtein_cutoff(self):
+        self.assertAlmostEqual(SimilarityCalculator.levenshtein_similarity("kitten", "sitting", 0.5), 0.57, places=2)
+        self.assertEqual(SimilarityCalculator.levenshtein_similarity("kitten", "sitting", 0.6), 0.0)
+        # Out-of-range cutoffs: negative means "no cutoff", above 1.0 rejects everything
+        self.assertAlmostEqual(SimilarityCalculator.levenshtein_similarity("kitten", "sitting", -0.5), 0.57, places=2)
+        self.assertEqual(SimilarityCalculator.levenshtein_similarity("abc", "abc", 1.5), 0.0)
+
     def test_simhash(self):
         h1 = SimilarityCalculator.get_simhash("int x = 0")
         h2 = SimilarityCalculator.get_simhash("int x = 0")
@@ -18,6 +25,19 @@ class TestUtils(unittest.TestCase):
         sim = SimilarityCalculator.get_hamming_similarity(h1, h3)
         self.assertTrue(0.0 <= sim <= 1.0)
 
+    def test_simhash_votes_are_additive(self):
+        lines = ["int x = 0 ;", "x ++ ;", "return x ;"]
+        votes = sum(SimilarityCalculator.get_simhash_votes(l.split()) for l in lines)
+        count = sum(len(l.split()) for l in lines)
+        self.assertEqual(SimilarityCalculator.simhash_from_votes(votes, count),
+                         SimilarityCalculator.get_simhash(" ".join(lines)))
+
+    def test_hamming_similarities(self):
+        hashes = [SimilarityCalculator.get_simhash(t) for t in ("int x = 0", "int y = 1", "")]
+        row = SimilarityCalculator.get_hamming_similarities(hashes[0], hashes)
+        self.assertEqual(row, [SimilarityCalculator.get_hamming_similarity(hashes[0], h) for h in hashes])
+        self.assertEqual(SimilarityCalculator.get_hamming_similarities(hashes[0], [None, hashes[0]]), [0.0, 1.0])
+
 class TestEngine(unittest.TestCase):
     def setUp(self):
         self.nodes_a = [
@@ -35,8 +55,10 @@ class TestEngine(unittest.TestCase):
         self.assertIn((0, 0), self.engine.anchors)
         
         # Matrix size check
-        self.assertEqual(len(self.engine.matrix), 2)
-        self.assertEqual(len(self.engine.matrix[0]), 2)
+        self.assertEqual(len(self.engine.context_matrix), 2)
+        self.assertEqual(len(self.engine.context_matrix[0]), 2)
+        self.assertEqual(len(self.engine.content_matrix), 2)
+        self.assertEqual(len(self.engine.content_matrix[0]), 2)
 
     def test_run_basic(self):
         config = {
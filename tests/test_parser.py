@@ -1,32 +1,54 @@
 import unittest
+import io
 import os
+import tempfile
+from contextlib import redirect_stderr
 from lhdiff_v2.input_controller import InputController, RawFileParser, CombinedFileParser
+from lhdiff_v2.truth import parse_truth_xml
 
 class TestInputController(unittest.TestCase):
     def setUp(self):
         self.controller = InputController()
-        # Create dummy files
-        with open("test_a.txt", "w") as f: f.write("line 1\nline 2")
-        with open("test_b.txt", "w") as f: f.write("line 1\nline 3")
-        with open("test_combined.txt", "w") as f:
+        # Dummy files live in a per-test directory that is removed afterwards
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.file_a = os.path.join(tmp.name, "a.txt")
+        self.file_b = os.path.join(tmp.name, "b.txt")
+        self.file_combined = os.path.join(tmp.name, "combined.txt")
+        with open(self.file_a, "w") as f: f.write("line 1\nline 2")
+        with open(self.file_b, "w") as f: f.write("line 1\nline 3")
+        with open(self.file_combined, "w") as f:
             f.write("--- OLD FILE ---\nold 1\n--- NEW FILE ---\nnew 1")
 
-    def tearDown(self):
-        if os.path.exists("test_a.txt"): os.remove("test_a.txt")
-        if os.path.exists("test_b.txt"): os.remove("test_b.txt")
-        if os.path.exists("test_combined.txt"): os.remove("test_combined.txt")
-
     def test_raw_parsing(self):
-        nodes_a, nodes_b = self.controller.parse("test_a.txt", "test_b.txt")
+        nodes_a, nodes_b = self.controller.parse(self.file_a, self.file_b)
         self.assertEqual(len(nodes_a), 2)
         self.assertEqual(len(nodes_b), 2)
         self.assertEqual(nodes_a[0].content, "line 1")
 
     def test_combined_parsing(self):
-        nodes_a, nodes_b = self.controller.parse("test_combined.txt")
+        nodes_a, nodes_b = self.controller.parse(self.file_combined)
         self.assertEqual(len(nodes_a), 1)
         self.assertEqual(len(nodes_b), 1)
         self.assertEqual(nodes_a[0].content, "old 1")
 
+class TestTruthXml(unittest.TestCase):
+    def write_xml(self, text):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "truth.xml")
+        with open(path, "w") as f: f.write(text)
+        return path
+
+    def test_only_direct_locations(self):
+        path = self.write_xml('<R><VERSION NUMBER="2"><LOCATION ORIG="1" NEW="2"/>'
+                              '<X><LOCATION ORIG="3" NEW="4"/></X></VERSION></R>')
+        self.assertEqual(parse_truth_xml(path), {1: 2})
+
+    def test_truncated_file_has_no_mapping(self):
+        path = self.write_xml('<R><VERSION NUMBER="2"><LOCATION ORIG="1" NEW="2"/>')
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(parse_truth_xml(path), {})
+
 if __name__ == '__main__':
     unittest.main()